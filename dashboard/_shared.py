@@ -0,0 +1,222 @@
+"""Data loading, filtering and chart specs shared by the dashboard pages"""
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+
+# Vega-Lite specs for the monthly charts, built once at import time instead of
+# going through Altair's encoding and validation on every rerun. Each is a bar
+# layer plus a text layer that labels the bars with their values; the x, y and
+# tooltip encodings are declared once at the top level and shared by both layers.
+PAYMENT_CHART_SPEC = {
+    'title': 'Average Payment Value by Month - São Paulo',
+    'width': 600,
+    'height': 400,
+    'encoding': {
+        'x': {'field': 'month', 'type': 'ordinal', 'title': 'Month'},
+        'y': {'field': 'avg_payment', 'type': 'quantitative', 'title': 'Average Payment Value (R$)'},
+        'tooltip': [
+            {'field': 'month', 'type': 'quantitative'},
+            {'field': 'avg_payment', 'type': 'quantitative'}
+        ]
+    },
+    'layer': [
+        {'mark': {'type': 'bar'}},
+        {
+            'mark': {'type': 'text', 'align': 'center', 'baseline': 'bottom', 'dy': -5},
+            'encoding': {
+                'text': {'field': 'avg_payment', 'type': 'quantitative', 'format': ',.2f'}
+            }
+        }
+    ]
+}
+
+REVIEW_CHART_SPEC = {
+    'title': 'Average Review Score by Month - São Paulo',
+    'width': 600,
+    'height': 400,
+    'encoding': {
+        'x': {'field': 'month', 'type': 'ordinal', 'title': 'Month'},
+        'y': {
+            'field': 'avg_score',
+            'type': 'quantitative',
+            'title': 'Average Review Score (1-5)',
+            'scale': {'domain': [0, 5]}
+        },
+        'tooltip': [
+            {'field': 'month', 'type': 'quantitative'},
+            {'field': 'avg_score', 'type': 'quantitative'}
+        ]
+    },
+    'layer': [
+        {'mark': {'type': 'bar', 'color': 'orange'}},
+        {
+            'mark': {'type': 'text', 'align': 'center', 'baseline': 'bottom', 'dy': -5},
+            'encoding': {
+                'text': {'field': 'avg_score', 'type': 'quantitative', 'format': '.2f'}
+            }
+        }
+    ]
+}
+
+@st.cache_resource(show_spinner=False)
+def load_data():
+    """Load and prepare all required datasets (cached across reruns)"""
+    # Cached as a resource so every rerun reuses the same frames instead of
+    # unpickling a fresh copy; callers must treat them as read-only.
+    #
+    # The four files are independent, so they are read in parallel threads
+    # (parsing releases the GIL). Only the columns the dashboard uses are read,
+    # dates are parsed while reading, and numeric columns use the smallest
+    # types that hold the values. pyarrow's multithreaded CSV reader is much
+    # faster than the default C engine, but the reviews file has comments
+    # spanning several lines, which pyarrow cannot parse through pandas, so it
+    # stays on the C engine.
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        orders = executor.submit(
+            pd.read_csv,
+            'data/olist_orders_dataset.csv',
+            engine='pyarrow',
+            usecols=['order_id', 'customer_id', 'order_purchase_timestamp'],
+            parse_dates=['order_purchase_timestamp']
+        )
+        customers = executor.submit(
+            pd.read_csv,
+            'data/olist_customers_dataset.csv',
+            engine='pyarrow',
+            usecols=['customer_id', 'customer_state'],
+            dtype={'customer_state': 'category'}
+        )
+        payments = executor.submit(
+            pd.read_csv,
+            'data/olist_order_payments_dataset.csv',
+            engine='pyarrow',
+            usecols=['order_id', 'payment_value'],
+            dtype={'payment_value': 'float32'}
+        )
+        reviews = executor.submit(
+            pd.read_csv,
+            'data/olist_order_reviews_dataset.csv',
+            usecols=['order_id', 'review_score', 'review_creation_date'],
+            dtype={'review_score': 'int8'},
+            parse_dates=['review_creation_date']
+        )
+    orders, customers, payments, reviews = (
+        orders.result(), customers.result(), payments.result(), reviews.result()
+    )
+    
+    # Encode the join keys as categoricals sharing one set of categories per key,
+    # so the merges below join on integer codes instead of hashing strings
+    customer_ids = pd.CategoricalDtype(customers['customer_id'].unique())
+    customers['customer_id'] = customers['customer_id'].astype(customer_ids)
+    orders['customer_id'] = orders['customer_id'].astype(customer_ids)
+    order_ids = pd.CategoricalDtype(orders['order_id'].unique())
+    orders['order_id'] = orders['order_id'].astype(order_ids)
+    payments['order_id'] = payments['order_id'].astype(order_ids)
+    reviews['order_id'] = reviews['order_id'].astype(order_ids)
+    
+    # Add month columns (int8 is plenty for 1-12)
+    orders['month'] = orders['order_purchase_timestamp'].dt.month.astype('int8')
+    reviews['month'] = reviews['review_creation_date'].dt.month.astype('int8')
+    
+    # Get min and max dates from orders for the date pickers
+    min_date = orders['order_purchase_timestamp'].min().date()
+    max_date = orders['order_purchase_timestamp'].max().date()
+    
+    return orders, customers, payments, reviews, min_date, max_date
+
+@st.cache_resource(show_spinner=False)
+def load_sao_paulo_data():
+    """Restrict the datasets to São Paulo customers once (cached across reruns)"""
+    # Shared read-only like load_data
+    orders, customers, payments, reviews, _, _ = load_data()
+    
+    # Get São Paulo customers and their orders
+    sao_paulo_customers = customers.loc[customers['customer_state'] == 'SP', ['customer_id']]
+    sp_orders = orders.merge(sao_paulo_customers, on='customer_id', how='inner')
+    sp_orders = sp_orders[['order_id', 'order_purchase_timestamp', 'month']]
+    
+    # Orders are only counted after this point, so keep just their dates
+    sp_order_dates = sp_orders['order_purchase_timestamp'].sort_values(kind='mergesort', ignore_index=True)
+    
+    # Attach the order date (and month) to payments, and the order date to reviews,
+    # keeping only the columns the date filter and monthly stats need. Everything
+    # is sorted by order date so the date filter can slice instead of scanning.
+    sp_payments = payments.merge(sp_orders, on='order_id', how='inner')
+    sp_payments = sp_payments[['order_purchase_timestamp', 'month', 'payment_value']]
+    sp_payments = sp_payments.sort_values('order_purchase_timestamp', kind='mergesort', ignore_index=True)
+    sp_reviews = reviews.merge(
+        sp_orders[['order_id', 'order_purchase_timestamp']],
+        on='order_id',
+        how='inner'
+    )
+    sp_reviews = sp_reviews[['order_purchase_timestamp', 'review_creation_date', 'month', 'review_score']]
+    sp_reviews = sp_reviews.sort_values('order_purchase_timestamp', kind='mergesort', ignore_index=True)
+    
+    return sp_order_dates, sp_payments, sp_reviews
+
+def date_range_slice(dates, start, end):
+    """Get the slice of sorted dates that fall within [start, end]"""
+    # Two binary searches instead of a comparison over every row
+    return slice(dates.searchsorted(start, side='left'), dates.searchsorted(end, side='right'))
+
+def filter_sao_paulo_data(sp_order_dates, sp_payments, sp_reviews, start_date, end_date):
+    """Count São Paulo orders and filter payments and reviews for the date range"""
+    # Convert the picker dates once and compare against the underlying numpy
+    # arrays, skipping pandas' Timestamp boxing and comparison dispatch
+    start = np.datetime64(start_date, 'ns')
+    end = np.datetime64(end_date, 'ns')
+    
+    # Orders are counted and payments filtered by order date
+    orders_range = date_range_slice(sp_order_dates.to_numpy(), start, end)
+    order_count = int(orders_range.stop - orders_range.start)
+    sp_payments_date_range = sp_payments.iloc[
+        date_range_slice(sp_payments['order_purchase_timestamp'].to_numpy(), start, end)
+    ]
+    
+    # Reviews are filtered by both order date and review creation date
+    sp_reviews_order_range = sp_reviews.iloc[
+        date_range_slice(sp_reviews['order_purchase_timestamp'].to_numpy(), start, end)
+    ]
+    review_dates = sp_reviews_order_range['review_creation_date'].to_numpy()
+    sp_reviews_date_range = sp_reviews_order_range[(review_dates >= start) & (review_dates <= end)]
+    
+    return order_count, sp_payments_date_range, sp_reviews_date_range
+
+def monthly_mean(months, values):
+    """Average the values for each month 1-12 (0 for months without values)"""
+    # One bincount pass sums the values into month buckets and another counts
+    # them, instead of building a groupby for only twelve groups
+    sums = np.bincount(months, weights=values, minlength=13)[1:13]
+    counts = np.bincount(months, minlength=13)[1:13]
+    
+    return sums / np.maximum(counts, 1)
+
+def calculate_monthly_stats(payments_filtered, reviews_filtered):
+    """Calculate payment and review statistics by month"""
+    # Calculate average payment (by order month) and average review score
+    # (by review creation month), with every month included
+    monthly_stats = pd.DataFrame({
+        'month': range(1, 13),
+        'avg_payment': monthly_mean(
+            payments_filtered['month'].to_numpy(),
+            payments_filtered['payment_value'].to_numpy()
+        ),
+        'avg_score': monthly_mean(
+            reviews_filtered['month'].to_numpy(),
+            reviews_filtered['review_score'].to_numpy()
+        )
+    })
+    
+    return monthly_stats
+
+@st.cache_data(show_spinner=False)
+def summarize_sao_paulo_data(start_date, end_date):
+    """Get the order count and monthly statistics for a date range (cached per range)"""
+    order_count, payments_filtered, reviews_filtered = filter_sao_paulo_data(
+        *load_sao_paulo_data(), start_date, end_date
+    )
+    
+    return order_count, calculate_monthly_stats(payments_filtered, reviews_filtered)